@@ -1,5 +1,4 @@
 import bpy
-from random import randrange
 
 # File:             AddParticlesToEmitter.py
 # Date:             08.25.2019
@@ -20,10 +19,10 @@ EMITTER_NAME = "Emitter"
 
 def create_particle_at_vertex(source_particle, source_emitter, vertex):
     
-    # Create Particle Object
+    # Create Particle Object (Shares Mesh Data With Source Particle)
     new_particle = bpy.data.objects.new(
-        name=(source_particle.name+".{:03d}").format(0),
-        object_data=source_particle.data.copy()
+        name=source_particle.name, # Blender Appends Unique ".###" Suffix
+        object_data=source_particle.data
     )
         
     # Position Object At Vertex
@@ -31,9 +30,6 @@ def create_particle_at_vertex(source_particle, source_emitter, vertex):
     new_particle.location.y = source_emitter.location.y + vertex.co.y
     new_particle.location.z = source_emitter.location.z + vertex.co.z
     
-    # Add Object to Scene
-    bpy.context.collection.objects.link(new_particle)
-    
     return new_particle
 
 
@@ -43,12 +39,17 @@ def main():
     # Declare Local Variables
     source_particle = bpy.data.objects[PARTICLE_NAME]
     source_emitter = bpy.data.objects[EMITTER_NAME]
+    link_object = bpy.context.collection.objects.link
     new_particles = []
     
     # Create Particles
     for vertex in source_emitter.data.vertices:
         new_particles.append(create_particle_at_vertex(source_particle, source_emitter, vertex))
     
+    # Add Particles to Scene
+    for particle in new_particles:
+        link_object(particle)
+    
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
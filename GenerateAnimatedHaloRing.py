@@ -1,7 +1,12 @@
 import bpy
 import math
 import mathutils
-from random import randrange
+import numpy as np
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
 
 # File:             GenerateAnimatedHaloRing.py
 # Date:             08.26.2019
@@ -44,11 +49,26 @@ from random import randrange
 #   5. (Optional) Select collection in Outliner view to hold generated objects.
 #   6. Run script!
 #
+# (Optional) Generate Slices in Parallel
+#   Slices are independent, so ranges of them can be generated by several background
+#   Blender processes at once.
+#   1. Set WORKER_PROCESSES above 1.
+#   2. Save the prepared file with the source slice selected (workers open the saved file
+#      and run this script's text block from it).
+#   3. Run script! Each process generates its share of the slices into a collection
+#      named WORKER_COLLECTION_NAME, which is appended into the selected collection.
+#   A single range of <ring samples> slices starting at <start sample> can also be
+#   generated by hand, writing the generated collection to a separate file to be
+#   appended later:
+#
+#     blender --background <file>.blend --python GenerateAnimatedHaloRing.py -- <start sample> <ring samples> <output>.blend
+#
 # Were you blinded by its majesty?
 #
 
 
 OUTPUT_SLICE_PROGRESS = True
+OUTPUT_OBJECT_PROGRESS_INTERVAL = 1000 # Number of Objects
 
 EMITTER_NAME = "Emitter"
 
@@ -57,6 +77,7 @@ ASSEMBLY_RANDOM_VARIATION = 20 # Number of Frames
 ASSEMBLY_TRAVEL_DISTANCE = 30 # Distance in Blender Units
 ASSEMBLY_START_VARIATION = 2 # Distance in Blender Units
 ASSEMBLY_FLIGHT_VARIATION = 1 # Distance in Blender Units
+ASSEMBLY_FLIGHT_WINDOW = .2 # Fraction of Assembly (Centered) in Which Flight is Varied
 
 # Note: RING_ANIMATION_START should match the beginning of the Animation Progress
 #       Marker rotation. To account for assembly, minimum value should be:
@@ -74,256 +95,299 @@ ORB_VISIBILITY_TRANSITION_LENGTH = 20 # Number of Frame
 CUBE_MATERIAL_SLOT_NAME = "Cube Material"
 CUBE_VISIBILITY_TRANSITION_LENGTH = 20 # Number of Frames
 CUBE_BRIGHTNESS_TRANSITION_LENGTH = 30 # Number of Frames
+ATTRIBUTE_NODE_VERSION = (2, 92, 0) # First Blender Version With Object Attribute Nodes
+
+ASSEMBLY_END_FRAME = RING_ANIMATION_START + ASSEMBLY_ANIMATION_LENGTH
+CUBE_VISIBLE_FRAME = ASSEMBLY_END_FRAME + CUBE_VISIBILITY_TRANSITION_LENGTH
+FLIGHT_VARIATION_START_FRAME = int(RING_ANIMATION_START + (((1 - ASSEMBLY_FLIGHT_WINDOW) / 2) * ASSEMBLY_ANIMATION_LENGTH))
+FLIGHT_VARIATION_END_FRAME = int(ASSEMBLY_END_FRAME - (((1 - ASSEMBLY_FLIGHT_WINDOW) / 2) * ASSEMBLY_ANIMATION_LENGTH))
+
+# Material Property Keyframes (Flattened (frame, value) Pairs, Before Per-Particle Offsets)
+ORB_VISIBILITY_KEYFRAMES = np.array((
+    RING_ANIMATION_START, 0.0,
+    RING_ANIMATION_START + (ASSEMBLY_ANIMATION_LENGTH / 10), 1.0,
+    ASSEMBLY_END_FRAME, 1.0,
+    ASSEMBLY_END_FRAME + ORB_VISIBILITY_TRANSITION_LENGTH, 0.0
+), dtype=np.float32)
+CUBE_VISIBILITY_KEYFRAMES = np.array((
+    ASSEMBLY_END_FRAME, 0.0,
+    CUBE_VISIBLE_FRAME, 1.0
+), dtype=np.float32)
+CUBE_BRIGHTNESS_KEYFRAMES = np.array((
+    CUBE_VISIBLE_FRAME, 18.0,
+    CUBE_VISIBLE_FRAME + CUBE_BRIGHTNESS_TRANSITION_LENGTH, 3.0
+), dtype=np.float32)
+
+ORB_VISIBILITY_PATH = "[\"{0}\"]".format(ORB_VISIBILITY)
+CUBE_VISIBILITY_PATH = "[\"{0}\"]".format(CUBE_VISIBILITY)
+CUBE_BRIGHTNESS_PATH = "[\"{0}\"]".format(CUBE_BRIGHTNESS)
+ANIMATED_DATA_PATHS = frozenset(("location", ORB_VISIBILITY_PATH, CUBE_VISIBILITY_PATH, CUBE_BRIGHTNESS_PATH))
+ANIMATED_CURVES = ( # (Data Path, Index) of Each Particle Curve, in Curve Order
+    ("location", 0),
+    ("location", 1),
+    ("location", 2),
+    (ORB_VISIBILITY_PATH, 3),
+    (CUBE_VISIBILITY_PATH, 4),
+    (CUBE_BRIGHTNESS_PATH, 5)
+)
 
 RING_SAMPLES = 5 # Number of Slices to Generate (Max of 2048)
 START_SAMPLE = 5 # Number of the First Slice in the Generated Samples
 
+WORKER_PROCESSES = 1 # Number of Background Blender Processes (1 Generates in This Process)
+WORKER_COLLECTION_NAME = "Generated Slices"
+
 RING_SLICES = 4096
 SLICE_ANGLE = 360 / RING_SLICES
 
 
 ### Low-Level, Highly Efficient API Manipulation Functions ###
 
-# Manually Insert Location Keyframe 
-def insert_location_keyframe(object, frame, location):
-    insert_indexed_keyframe(object, 0, "location", frame, location[0])
-    insert_indexed_keyframe(object, 1, "location", frame, location[1])
-    insert_indexed_keyframe(object, 2, "location", frame, location[2])
-    
-# Manually insert keyframe of <value> on curve of <index> and <name> at <frame> for given <object>.
+# Create an action for <object> holding one curve for each entry of ANIMATED_CURVES. Curves
+# are created once, up front, so keyframes can be written straight to them by index. Each
+# particle needs its own action, as start position, flight path, orb visibility, and delay
+# are all randomized per particle (mirrored duplicates share their source's action).
 # Source: https://docs.blender.org/api/blender_python_api_2_69_10/info_quickstart.html#animation
-def insert_indexed_keyframe(object, curve_index, curve_name, frame, value):
+def create_animation_curves(object):
+    object.animation_data_create()
+    object.animation_data.action = bpy.data.actions.new(name="HaloAnimationAction")
+    for curve_name, curve_index in ANIMATED_CURVES:
+        object.animation_data.action.fcurves.new(data_path=curve_name, index=curve_index)
     
-    # Ensure Object Has Animation Data
-    if object.animation_data is None:
-        object.animation_data_create()
-        
-    # Ensure Animation Data Has Action
-    if object.animation_data.action is None:
-        object.animation_data.action = bpy.data.actions.new(name="HaloAnimationAction")
-        
-    # Get Curve
-    curve = 0
-    if len(object.animation_data.action.fcurves) < curve_index + 1:
-        curve = object.animation_data.action.fcurves.new(data_path=curve_name, index=curve_index)
-    else:
-        curve = object.animation_data.action.fcurves[curve_index]
-
-    # Add Keyframe
-    curve.keyframe_points.insert(frame, value)
+# Manually Insert Location Keyframes of <locations> at <frames> for given <object>.
+def insert_location_keyframes(object, frames, locations):
+    locations = np.asarray(locations, dtype=np.float32).reshape(-1, 3)
+    co = np.empty(len(frames) * 2, dtype=np.float32)
+    co[0::2] = frames
+    for index in range(3):
+        co[1::2] = locations[:, index]
+        insert_indexed_keyframes(object, index, co)
+    
+# Manually insert keyframes of flattened (frame, value) pairs <co> on curve of <index> for
+# given <object>. Keyframes are added in bulk and written with a single foreach_set.
+# Source: https://docs.blender.org/api/current/bpy.types.bpy_prop_collection.html#bpy.types.bpy_prop_collection.foreach_set
+def insert_indexed_keyframes(object, curve_index, co):
+    curve = object.animation_data.action.fcurves[curve_index]
+    co = np.asarray(co, dtype=np.float32)
+    
+    # Preserve Existing Keyframes
+    existing_count = len(curve.keyframe_points)
+    if existing_count > 0:
+        existing_co = np.empty(existing_count * 2, dtype=np.float32)
+        curve.keyframe_points.foreach_get("co", existing_co)
+        co = np.concatenate((existing_co, co))
+    
+    # Add Keyframes (Bezier Interpolated With Automatic Handles, So Already Eased)
+    curve.keyframe_points.add((len(co) // 2) - existing_count)
+    curve.keyframe_points.foreach_set("co", co)
+    
+    # Sort Keyframes & Calculate Handles
+    curve.update()
+    
+# Shift all keyframes of <curve> by <offset> frames. Keyframes are read, offset, and written
+# back with a single foreach_get/foreach_set. Handles are left to curve.update(), which
+# recalculates the (still automatic) handles from the shifted keyframes.
+def shift_curve_keyframes(curve, offset):
+    co = np.empty(len(curve.keyframe_points) * 2, dtype=np.float32)
+    curve.keyframe_points.foreach_get("co", co)
+    co[0::2] += offset
+    curve.keyframe_points.foreach_set("co", co)
+    curve.update()
+    
+# Copy <material> with a driver connecting each value node named in <property_names> to the
+# particle property of the same name. Driver targets are left empty until the template is
+# copied for a specific particle, sparing a driver_add() per particle.
+def create_driven_material_template(material, property_names):
+    template = material.copy()
+    for property_name in property_names:
+        driver_path = 'nodes["{0}"].outputs[0].default_value'.format(property_name)
+        driver = template.node_tree.driver_add(driver_path)
+        driver.driver.expression = "var"
+        variable = driver.driver.variables.new()
+        variable.type = "SINGLE_PROP"
+        variable.targets[0].data_path = "[\"{0}\"]".format(property_name)
+    return template
+    
+# Copy <material>, replacing each value node named in <property_names> with an attribute node
+# reading the object property of the same name. Unlike a driven material, the copy reads the
+# properties of whichever object renders it, so a single copy can be shared by many particles.
+# Source: https://docs.blender.org/manual/en/latest/render/shader_nodes/input/attribute.html
+def create_attribute_material(material, property_names):
+    shared_material = material.copy()
+    nodes = shared_material.node_tree.nodes
+    links = shared_material.node_tree.links
+    for property_name in property_names:
+        value_node = nodes[property_name]
+        attribute_node = nodes.new("ShaderNodeAttribute")
+        attribute_node.attribute_type = "OBJECT"
+        attribute_node.attribute_name = property_name
+        attribute_node.location = value_node.location
+        for link in list(value_node.outputs[0].links):
+            links.new(attribute_node.outputs["Fac"], link.to_socket)
+        nodes.remove(value_node)
+    return shared_material
+    
+# Assign <material> to <particle>'s material slot of <slot_index>. The slot is linked to the
+# object rather than its mesh data, since particles share a single mesh.
+def assign_material(particle, slot_index, material):
+    slot = particle.material_slots[slot_index]
+    slot.link = "OBJECT"
+    slot.material = material
+    
+# Copy driven material <template> into <particle>'s material slot of <slot_index> and point
+# the copied drivers at the particle.
+def assign_driven_material(particle, slot_index, template):
+    material = template.copy()
+    assign_material(particle, slot_index, material)
+    for driver in material.node_tree.animation_data.drivers:
+        driver.driver.variables[0].targets[0].id = particle
+    return material
     
 
 ### Utility Functions ###
 
 def duplicate_particle(particle):
     
-    # Create Particle Object
+    # Create Particle Object (Shares Mesh Data With Source Particle)
     new_particle = particle.copy()
-    new_particle.data = particle.data.copy()
-    new_particle.location = particle.location
+    
+    # Create Particle Animation Curves
+    create_animation_curves(new_particle)
     
     return new_particle
 
 
-def create_basic_motion_keyframes(slice, source_emitter):
+def create_basic_motion_keyframes(slice, end_locations, emitter_location):
+    start_frame = RING_ANIMATION_START
+    end_frame = ASSEMBLY_END_FRAME
     
-    # Set Final Location Keyframe
-    start_frame = RING_ANIMATION_START + ASSEMBLY_ANIMATION_LENGTH
-    for particle in slice:
-        insert_location_keyframe(particle, start_frame, (particle.location.x, particle.location.y, particle.location.z))
-    
-    # Set Start Location Keyframe
-    end_frame = RING_ANIMATION_START
+    # Determine Start Variations
     random_range = int(ASSEMBLY_START_VARIATION * 30)
-    for particle in slice:
-        x_variation = 0
-        y_variation = 0
-        z_variation = 0
-        if random_range != 0:
-            x_variation = randrange(-random_range, random_range) / 30
-            y_variation = randrange(-random_range, random_range) / 30
-            z_variation = randrange(-random_range, random_range) / 30
-        x_distance = particle.location.x - source_emitter.location.x
-        x_pos_sign = 1
-        if x_distance != 0:
-            x_pos_sign = (x_distance) / abs(x_distance)
-        y_distance = particle.location.y - source_emitter.location.y
-        y_pos_sign = 1
-        if y_distance != 0:
-            y_pos_sign = (y_distance) / abs(y_distance)
-        z_distance = particle.location.z - source_emitter.location.z
-        z_pos_sign = 1
-        if z_distance != 0:
-            z_pos_sign = (z_distance) / abs(z_distance)
-        x_pos = ((particle.location.x - source_emitter.location.x) * ASSEMBLY_TRAVEL_DISTANCE) + source_emitter.location.x + x_variation
-        y_pos = ((particle.location.y - source_emitter.location.y) * ASSEMBLY_TRAVEL_DISTANCE) + source_emitter.location.y + y_variation
-        z_pos = ((particle.location.z - source_emitter.location.z) * ASSEMBLY_TRAVEL_DISTANCE/20) + source_emitter.location.z + z_variation
-        insert_location_keyframe(particle, end_frame, (x_pos, y_pos, z_pos))
+    variations = np.zeros(end_locations.shape, dtype=np.float32)
+    if random_range != 0:
+        variations = np.random.randint(-random_range, random_range, end_locations.shape) / 30
+    
+    # Calculate Start Locations
+    start_locations = get_start_locations(end_locations, emitter_location, variations)
+    
+    # Build Location Keyframes (Flattened (frame, value) Pairs Per Particle & Axis)
+    location_co = np.empty((len(slice), 3, 4), dtype=np.float32)
+    location_co[:, :, 0] = start_frame
+    location_co[:, :, 1] = start_locations
+    location_co[:, :, 2] = end_frame
+    location_co[:, :, 3] = end_locations
+    
+    # Set Start & Final Location Keyframes
+    for particle, particle_location_co in zip(slice, location_co):
+        for index in range(3):
+            insert_indexed_keyframes(particle, index, particle_location_co[index])
         
 
 def create_animated_materials(slice):
-    for particle in slice:
+    
+    # Nothing to Animate in an Empty Slice
+    if len(slice) == 0:
+        return
+    
+    # Find Material Slots (Same Positions For Every Particle, Since Particles Share a Mesh)
+    orb_slot_index = slice[0].material_slots.find(ORB_MATERIAL_SLOT_NAME)
+    cube_slot_index = slice[0].material_slots.find(CUBE_MATERIAL_SLOT_NAME)
+    for slot_name, slot_index in ((ORB_MATERIAL_SLOT_NAME, orb_slot_index), (CUBE_MATERIAL_SLOT_NAME, cube_slot_index)):
+        if slot_index == -1:
+            raise KeyError("Particle \"{0}\" has no material slot named \"{1}\".".format(slice[0].name, slot_name))
+    
+    # Create Slice Materials
+    # (Attribute Nodes Let the Whole Slice Share One Copy of Each Material. Older Versions
+    #  Fall Back to a Driven Material Template Copied For Each Particle.)
+    share_materials = bpy.app.version >= ATTRIBUTE_NODE_VERSION
+    orb_material = slice[0].material_slots[orb_slot_index].material
+    cube_material = slice[0].material_slots[cube_slot_index].material
+    if share_materials:
+        orb_material = create_attribute_material(orb_material, (ORB_VISIBILITY,))
+        cube_material = create_attribute_material(cube_material, (CUBE_VISIBILITY, CUBE_BRIGHTNESS))
+    else:
+        orb_material = create_driven_material_template(orb_material, (ORB_VISIBILITY,))
+        cube_material = create_driven_material_template(cube_material, (CUBE_VISIBILITY, CUBE_BRIGHTNESS))
+    
+    # Generate Orb Visibility Offsets
+    orb_visibility_offsets = np.random.randint(0, ORB_VISIBILITY_VARIATION + 1, len(slice))
+    
+    # Build Orb Visibility Keyframes (Flattened (frame, value) Pairs Per Particle)
+    orb_visibility_co = np.tile(ORB_VISIBILITY_KEYFRAMES, (len(slice), 1))
+    orb_visibility_co[:, 0] += orb_visibility_offsets
+    orb_visibility_co[:, 2] += orb_visibility_offsets
+    
+    for particle, particle_orb_visibility_co in zip(slice, orb_visibility_co):
         
         # Create Custom Properties
         particle[ORB_VISIBILITY] = 0.0
         particle[CUBE_VISIBILITY] = 0.0
         particle[CUBE_BRIGHTNESS] = 0.0
         
-        ### Orb Visibility ###
-        
-        # Generate Orb Visibility Offset
-        orb_visibility_offset = randrange(0, ORB_VISIBILITY_VARIATION + 1)
-        
-        # Set First Orb Visibility Keyframe
-        frame = RING_ANIMATION_START + orb_visibility_offset
-        insert_indexed_keyframe(particle, 3, "[\"{0}\"]".format(ORB_VISIBILITY), frame, 0.0)
-        
-        # Set Second Orb Visibility Keyframe
-        frame = RING_ANIMATION_START + orb_visibility_offset + (ASSEMBLY_ANIMATION_LENGTH / 10)
-        insert_indexed_keyframe(particle, 3, "[\"{0}\"]".format(ORB_VISIBILITY), frame, 1.0)
-        
-        # Set Third Orb Visibility Keyframe
-        frame = RING_ANIMATION_START + ASSEMBLY_ANIMATION_LENGTH
-        insert_indexed_keyframe(particle, 3, "[\"{0}\"]".format(ORB_VISIBILITY), frame, 1.0)
-        
-        # Set Fourth Orb Visibility Keyframe
-        frame = RING_ANIMATION_START + ASSEMBLY_ANIMATION_LENGTH + ORB_VISIBILITY_TRANSITION_LENGTH
-        insert_indexed_keyframe(particle, 3, "[\"{0}\"]".format(ORB_VISIBILITY), frame, 0.0)
-        
-        # Duplicate Material For Object (Necessary to Create Material Driver)
-        newMaterial = particle.material_slots[ORB_MATERIAL_SLOT_NAME].material.copy()
-        particle.material_slots[ORB_MATERIAL_SLOT_NAME].material = newMaterial
-        
-        # Add Driver For Material & Connect to Property
-        driver_path = 'nodes["{0}"].outputs[0].default_value'.format(ORB_VISIBILITY)
-        driver = particle.material_slots[newMaterial.name].material.node_tree.driver_add(driver_path)
-        driver.driver.expression = "var"
-        variable = driver.driver.variables.new()
-        variable.type = "SINGLE_PROP"
-        variable.targets[0].id = particle
-        variable.targets[0].data_path = "[\"{0}\"]".format(ORB_VISIBILITY)
-        
-        ### Cube Visibility ###
-        
-        # Set Initial Cube Visibility Keyframe
-        frame = RING_ANIMATION_START + ASSEMBLY_ANIMATION_LENGTH
-        insert_indexed_keyframe(particle, 4, "[\"{0}\"]".format(CUBE_VISIBILITY), frame, 0.0)
-        
-        # Set Final Cube Visibility Keyframe
-        frame = RING_ANIMATION_START + ASSEMBLY_ANIMATION_LENGTH + CUBE_VISIBILITY_TRANSITION_LENGTH
-        insert_indexed_keyframe(particle, 4, "[\"{0}\"]".format(CUBE_VISIBILITY), frame, 1.0)
-        
-        # Duplicate Material For Object (Necessary to Create Material Driver)
-        newMaterial = particle.material_slots[CUBE_MATERIAL_SLOT_NAME].material.copy()
-        particle.material_slots[CUBE_MATERIAL_SLOT_NAME].material = newMaterial
-        
-        # Add Driver For Material & Connect to Property
-        driver_path = 'nodes["{0}"].outputs[0].default_value'.format(CUBE_VISIBILITY)
-        driver = particle.material_slots[newMaterial.name].material.node_tree.driver_add(driver_path)
-        driver.driver.expression = "var"
-        variable = driver.driver.variables.new()
-        variable.type = "SINGLE_PROP"
-        variable.targets[0].id = particle
-        variable.targets[0].data_path = "[\"{0}\"]".format(CUBE_VISIBILITY)
-        
-        ### Cube Brightness ###
-        
-        # Set Initial Cube Brightness Keyframe
-        frame = RING_ANIMATION_START + ASSEMBLY_ANIMATION_LENGTH + CUBE_VISIBILITY_TRANSITION_LENGTH
-        insert_indexed_keyframe(particle, 5, "[\"{0}\"]".format(CUBE_BRIGHTNESS), frame, 18.0)
-        
-        # Set Final Cube Brightness Keyframe
-        frame = RING_ANIMATION_START + ASSEMBLY_ANIMATION_LENGTH + CUBE_VISIBILITY_TRANSITION_LENGTH + CUBE_BRIGHTNESS_TRANSITION_LENGTH
-        insert_indexed_keyframe(particle, 5, "[\"{0}\"]".format(CUBE_BRIGHTNESS), frame, 3.0)
+        # Set Material Property Keyframes
+        insert_indexed_keyframes(particle, 3, particle_orb_visibility_co)
+        insert_indexed_keyframes(particle, 4, CUBE_VISIBILITY_KEYFRAMES)
+        insert_indexed_keyframes(particle, 5, CUBE_BRIGHTNESS_KEYFRAMES)
         
-        # Duplicate Material For Object (Necessary to Create Material Driver)
-        old_material_name = newMaterial.name
-        newMaterial = particle.material_slots[old_material_name].material.copy()
-        particle.material_slots[old_material_name].material = newMaterial
-        
-        # Add Driver For Material & Connect to Property
-        driver_path = 'nodes["{0}"].outputs[0].default_value'.format(CUBE_BRIGHTNESS)
-        driver = particle.material_slots[newMaterial.name].material.node_tree.driver_add(driver_path)
-        driver.driver.expression = "var"
-        variable = driver.driver.variables.new()
-        variable.type = "SINGLE_PROP"
-        variable.targets[0].id = particle
-        variable.targets[0].data_path = "[\"{0}\"]".format(CUBE_BRIGHTNESS)
+        # Assign Shared Materials or Duplicate Driven Materials For Object
+        if share_materials:
+            assign_material(particle, orb_slot_index, orb_material)
+            assign_material(particle, cube_slot_index, cube_material)
+        else:
+            assign_driven_material(particle, orb_slot_index, orb_material)
+            assign_driven_material(particle, cube_slot_index, cube_material)
+    
+    # Remove Material Templates
+    if not share_materials:
+        bpy.data.materials.remove(orb_material)
+        bpy.data.materials.remove(cube_material)
 
 
 def randomize_flight_pattern(slice):
-    for particle in slice:
-        
-        # Determine Variation Frame
-        range = .2
-        range_start = int(RING_ANIMATION_START + (((1 - range) / 2) * ASSEMBLY_ANIMATION_LENGTH))
-        range_end = int((RING_ANIMATION_START + ASSEMBLY_ANIMATION_LENGTH) - (((1 - range) / 2) * ASSEMBLY_ANIMATION_LENGTH))
-        frame = randrange(range_start, range_end)
-        
-        # Determine Variation Position
-        random_range = int(ASSEMBLY_FLIGHT_VARIATION * 30)
-        x_variation = 0
-        y_variation = 0
-        z_variation = 0
-        if random_range != 0:
-            x_variation = randrange(-int(random_range/2), int(random_range/2)) / 30
-            y_variation = randrange(-int(random_range/2), int(random_range/2)) / 30
-            z_variation = randrange(-random_range, random_range) / 30
-        
-        # Determine Position
-        x_position = particle.location.x
-        y_position = particle.location.y
-        z_position = particle.location.z
-        curves = bpy.data.objects[particle.name].animation_data.action.fcurves
-        for curve_number, curve in enumerate(curves):
-            if curve.data_path == "location":
-                if curve_number == 0:
-                    x_position = curve.evaluate(frame)
-                elif curve_number == 1:
-                    y_position = curve.evaluate(frame)
-                else:
-                    z_position = curve.evaluate(frame)
-    
-        # Insert Keyframe
-        insert_location_keyframe(particle, frame, (x_position + x_variation, y_position + y_variation, z_position + z_variation))
+    
+    # Determine Variation Frames
+    frames = np.random.randint(FLIGHT_VARIATION_START_FRAME, FLIGHT_VARIATION_END_FRAME, len(slice))
+    
+    # Determine Variation Positions
+    random_range = int(ASSEMBLY_FLIGHT_VARIATION * 30)
+    variations = np.zeros((len(slice), 3))
+    if random_range != 0:
+        variations[:, 0:2] = np.random.randint(-int(random_range/2), int(random_range/2), (len(slice), 2)) / 30
+        variations[:, 2] = np.random.randint(-random_range, random_range, len(slice)) / 30
+    
+    # Evaluate Positions at Variation Frames (Location Curves Are First in ANIMATED_CURVES)
+    positions = np.array([
+        [curve.evaluate(frame) for curve in particle.animation_data.action.fcurves[0:3]]
+        for particle, frame in zip(slice, frames.tolist())
+    ]).reshape(-1, 3)
+    positions += variations
+    
+    # Insert Keyframes
+    for particle, frame, position in zip(slice, frames.tolist(), positions):
+        insert_location_keyframes(particle, (frame,), (position,))
         
 
-def randomize_keyframe_delay(slice):
-    for particle in slice:
+def randomize_keyframe_delay(slice, offset):
+    
+    # Calculate Delays (Random Delay Plus Slice Animation Offset)
+    delays = np.full(len(slice), offset)
+    if ASSEMBLY_RANDOM_VARIATION > 0:
+        delays += np.random.randint(0, ASSEMBLY_RANDOM_VARIATION, len(slice))
+    
+    for particle, delay in zip(slice, delays.tolist()):
         curves = particle.animation_data.action.fcurves
         
-        # Calculate Delay
-        delay = 0
-        if ASSEMBLY_RANDOM_VARIATION > 0:
-            delay = randrange(0, ASSEMBLY_RANDOM_VARIATION)
-        
         # For Each Location or Material Keyframe
         for curve in curves:
-            if curve.data_path == "location" \
-                or curve.data_path == "[\"{0}\"]".format(ORB_VISIBILITY) \
-                or curve.data_path == "[\"{0}\"]".format(CUBE_VISIBILITY) \
-                or curve.data_path == "[\"{0}\"]".format(CUBE_BRIGHTNESS):
-                for keyframe_point in curve.keyframe_points:
+            if curve.data_path in ANIMATED_DATA_PATHS:
+                
+                # Advance By Offset
+                shift_curve_keyframes(curve, delay)
                     
-                    # Advance By Offset
-                    keyframe_point.co.x = keyframe_point.co.x + delay
-                    keyframe_point.handle_left.x = keyframe_point.handle_left.x + delay
-                    keyframe_point.handle_right.x = keyframe_point.handle_right.x + delay
-                    
-def ease_keyframes(slice):
-    for particle in slice:
-        for curve in particle.animation_data.action.fcurves:
-            if curve.data_path == "location":
-                for keyframe_point in curve.keyframe_points:
-                    keyframe_point.interpolation = "BEZIER"
-    
-
 def remove_easing_on_start_frame(slice):
     for particle in slice:
-        curves = particle.animation_data.action.fcurves
-        for curve in curves:
-            if curve.data_path == "location":
-                curve.keyframe_points[0].handle_right = curve.keyframe_points[0].co
+        for curve in particle.animation_data.action.fcurves[0:3]: # Location Curves
+            curve.keyframe_points[0].handle_right = curve.keyframe_points[0].co
 
 
 def duplicate_slice(slice, source_empty):
@@ -332,21 +396,20 @@ def duplicate_slice(slice, source_empty):
     empty = source_empty.copy()
     
     # Parent Empty to Particles
+    parent_inverse = empty.matrix_world.inverted()
     new_particles = []
     for particle in slice:
         
-        # Create Duplicate Particle
+        # Create Duplicate Particle (Shares Mesh Data With Source Particle)
         new_particle = particle.copy()
-        new_particle.data = particle.data.copy()
         
-        # Copy Animations
-        action_copy = particle.animation_data.action.copy()
+        # Share Animations (Mirrored Particle Animates Identically)
         new_particle.animation_data_create()
-        new_particle.animation_data.action = action_copy
+        new_particle.animation_data.action = particle.animation_data.action
         
         # Set Particle Parent
         new_particle.parent = empty
-        new_particle.matrix_parent_inverse = empty.matrix_world.inverted()
+        new_particle.matrix_parent_inverse = parent_inverse
         
         new_particles.append(new_particle)
     
@@ -354,6 +417,12 @@ def duplicate_slice(slice, source_empty):
 
 
 def rotate_slice_by_angle(empty, angle_vector):
+    
+    # Assign Directly in Default XYZ Euler Mode (Slice Empties Are Created in This Mode)
+    if empty.rotation_mode == "XYZ":
+        empty.rotation_euler = angle_vector
+        return
+    
     euler = mathutils.Euler(angle_vector, 'XYZ')
 
     if empty.rotation_mode == "QUATERNION":
@@ -367,132 +436,206 @@ def rotate_slice_by_angle(empty, angle_vector):
             euler.to_quaternion().to_euler(empty.rotation_mode))
             
 
-def offset_animations(slice, offset):
-    for particle in slice:
-        curves = particle.animation_data.action.fcurves
-        
-        # For Each Location or Material Keyframe
-        for curve in curves:
-            if curve.data_path == "location" \
-                or curve.data_path == "[\"{0}\"]".format(ORB_VISIBILITY) \
-                or curve.data_path == "[\"{0}\"]".format(CUBE_VISIBILITY) \
-                or curve.data_path == "[\"{0}\"]".format(CUBE_BRIGHTNESS):
-                for keyframe_point in curve.keyframe_points:
-                    
-                    # Advance By Offset
-                    keyframe_point.co.x = keyframe_point.co.x + offset
-                    keyframe_point.handle_left.x = keyframe_point.handle_left.x + offset
-                    keyframe_point.handle_right.x = keyframe_point.handle_right.x + offset
+def print_progress(message):
+    # Written straight to stdout and flushed so progress appears in Blender's system
+    # console as it happens, rather than whenever the console buffer fills.
+    sys.stdout.write(message + "\n")
+    sys.stdout.flush()
 
 
 def hide_object(object):
-    bpy.data.objects[object.name].hide_viewport = True
+    object.hide_viewport = True
     
     
+def get_start_locations(end_locations, emitter_location, variations):
+    # Pure array kernel (no Blender API access) projecting each particle's final location
+    # outward from the emitter. Operates in place on a single buffer to avoid temporaries.
+    start_locations = end_locations - emitter_location
+    start_locations *= (ASSEMBLY_TRAVEL_DISTANCE, ASSEMBLY_TRAVEL_DISTANCE, ASSEMBLY_TRAVEL_DISTANCE / 20)
+    start_locations += emitter_location
+    start_locations += variations
+    return start_locations
+
+
 def get_offset_for_slice(angle):
     # Equation generated by plugging many points on "Animation Progress Marker" rotation
     # curve into free regression curve fitting website MyCurvefit.com and solving the
     # resulting equation for x via WolframAlpha. The resulting equation determines the
-    # frame offset of a slice for a given angle (0-180).
+    # frame offset of a slice for a given angle (0-180), or for each of an array of angles.
     return ((-(-4715661497503125 * angle - 4030738072695250)/(48868807743 - 201647250 * angle)) ** 0.4614561803518418)
 
 
+### Background Process Functions ###
+
+def generate_in_background_processes(start_sample=START_SAMPLE, ring_samples=RING_SAMPLES):
+    # Splits the slice range across WORKER_PROCESSES background Blender processes, each
+    # running this script's text block from the saved .blend file, then appends every
+    # process's generated collection into the active collection. bpy can't be used from
+    # threads or forked processes, so each worker is a separate Blender instance.
+    
+    # Workers Open the File on Disk, So It Must Be Saved & Current
+    if bpy.data.filepath == "":
+        print_progress("Save the file before generating slices in background processes.")
+        return
+    if bpy.data.is_dirty:
+        print_progress("Save unsaved changes before generating slices in background processes.")
+        return
+    
+    # Run From Text Editor, Where __file__ is "<file>.blend/<text block name>"
+    text_name = os.path.basename(__file__)
+    output_directory = tempfile.mkdtemp()
+    samples = np.arange(start_sample, start_sample + ring_samples)
+    
+    try:
+        
+        # Start Workers
+        workers = []
+        for worker_samples in np.array_split(samples, WORKER_PROCESSES):
+            if len(worker_samples) == 0:
+                continue
+            output_path = os.path.join(output_directory, "Slices{0}.blend".format(len(workers)))
+            workers.append((output_path, subprocess.Popen([
+                bpy.app.binary_path, "--background", bpy.data.filepath,
+                "--python-exit-code", "1", "--python-text", text_name, "--",
+                str(worker_samples[0]), str(len(worker_samples)), output_path
+            ])))
+        
+        # Append Generated Slices as Workers Finish
+        for index, (output_path, worker) in enumerate(workers):
+            if worker.wait() != 0 or not os.path.exists(output_path):
+                print_progress("Worker {0} of {1} failed; its slices were not added.".format(index + 1, len(workers)))
+                continue
+            with bpy.data.libraries.load(output_path) as (data_from, data_to):
+                data_to.collections = data_from.collections
+            for collection in data_to.collections:
+                bpy.context.collection.children.link(collection)
+            if OUTPUT_SLICE_PROGRESS:
+                print_progress("Worker {0} of {1} slices added to scene.".format(index + 1, len(workers)))
+    
+    finally:
+        
+        # Remove Worker Files
+        shutil.rmtree(output_directory)
+    
+    # Return to Start Frame
+    bpy.context.scene.frame_set(RING_ANIMATION_START)
+
+
 ### Main Program ###
 
-def main():
+def main(start_sample=START_SAMPLE, ring_samples=RING_SAMPLES):
    
+    # Cache Context Lookups Used in Loops
+    scene = bpy.context.scene
+    link_object = bpy.context.collection.objects.link
+    
     # Get Emitter
     source_emitter = bpy.data.objects[EMITTER_NAME]
     
     # Get Selected Slice Particles
-    source_particles = []
-    for o in bpy.context.selected_objects:
-        if o.name != EMITTER_NAME:
-            source_particles.append(o)
+    source_particles = [o for o in bpy.context.selected_objects if o.name != EMITTER_NAME]
+    
+    # Snapshot Final Particle & Emitter Locations (Shared By Every Slice)
+    source_locations = np.array([particle.location for particle in source_particles], dtype=np.float32).reshape(-1, 3)
+    emitter_location = np.array(source_emitter.location, dtype=np.float32)
     
     # Create Final Object List
     object_list = []
     
     # Create Source Empty
-    source_empty = bpy.data.objects.new("ParticleEmpty.{:03d}".format(0), None)
+    source_empty = bpy.data.objects.new("ParticleEmpty.000", None)
     
     # Calculate Slice Animation Offsets
     start_animation_length = 107 + ASSEMBLY_ANIMATION_LENGTH + CUBE_VISIBILITY_TRANSITION_LENGTH
-    step_offsets = []
-    for sample in range(START_SAMPLE, START_SAMPLE + RING_SAMPLES):
-        angle = (180 / (RING_SLICES / 2)) * sample
-        step_offsets.append(get_offset_for_slice(angle) - start_animation_length)
+    angles = (180 / (RING_SLICES / 2)) * np.arange(start_sample, start_sample + ring_samples)
+    step_offsets = get_offset_for_slice(angles) - start_animation_length
+    
+    # Calculate Slice Rotation Angles
+    rotation_angles = np.radians(SLICE_ANGLE * np.arange(start_sample, start_sample + ring_samples))
     
     # For Each Sample (Number of Slices to Generate)
-    for sample in range(START_SAMPLE, START_SAMPLE + RING_SAMPLES):
+    for sample in range(start_sample, start_sample + ring_samples):
     
         # Create New Slice
-        new_slice_particles = []
-        for particle in source_particles:
-            new_slice_particles.append(duplicate_particle(particle))
+        new_slice_particles = [duplicate_particle(particle) for particle in source_particles]
         
         # Configure New Slice
-        create_basic_motion_keyframes(new_slice_particles, source_emitter)
+        create_basic_motion_keyframes(new_slice_particles, source_locations, emitter_location)
         create_animated_materials(new_slice_particles)
         randomize_flight_pattern(new_slice_particles)
-        randomize_keyframe_delay(new_slice_particles)
-        offset_animations(new_slice_particles, step_offsets[sample - START_SAMPLE])
-        ease_keyframes(new_slice_particles)
+        randomize_keyframe_delay(new_slice_particles, step_offsets[sample - start_sample])
         remove_easing_on_start_frame(new_slice_particles)
         
         # Create Slice Empty
         empty = source_empty.copy()
         
         # Parent Empty to Particles
+        parent_inverse = empty.matrix_world.inverted()
         for particle in new_slice_particles:
             particle.parent = empty
-            particle.matrix_parent_inverse = empty.matrix_world.inverted()
+            particle.matrix_parent_inverse = parent_inverse
         
         # Determine Rotation Angle
-        angle = SLICE_ANGLE * sample
+        angle = rotation_angles[sample - start_sample]
         
         # Rotate Empty
         if sample == 0:
             print("")
         elif sample == (RING_SLICES / 2):
-            rotate_slice_by_angle(empty, (0.0, 0.0, math.radians(180)))
+            rotate_slice_by_angle(empty, (0.0, 0.0, math.pi))
         else:
             duplicate_slice_empty, duplicate_slice_particles = duplicate_slice(new_slice_particles, source_empty)
-            rotate_slice_by_angle(empty, (0.0, 0.0, math.radians(angle)))
-            rotate_slice_by_angle(duplicate_slice_empty, (math.radians(180), 0.0, -math.radians(angle)))
+            rotate_slice_by_angle(empty, (0.0, 0.0, angle))
+            rotate_slice_by_angle(duplicate_slice_empty, (math.pi, 0.0, -angle))
             
             # Add Duplicate Slice to Object List
             object_list.append(duplicate_slice_empty)
-            for particle in duplicate_slice_particles:
-                object_list.append(particle)
+            object_list.extend(duplicate_slice_particles)
             
         # Print Update
         if OUTPUT_SLICE_PROGRESS:
-            print("Slice {0} of {1} processed.".format((sample - START_SAMPLE) + 1, RING_SAMPLES))
+            print_progress("Slice {0} of {1} processed.".format((sample - start_sample) + 1, ring_samples))
             
         # Add Slice to Object List
         object_list.append(empty)
-        for particle in new_slice_particles:
-            object_list.append(particle)
+        object_list.extend(new_slice_particles)
             
     # Update All Object Curves
+    object_count = len(object_list)
     for index, object in enumerate(object_list):
-        if OUTPUT_SLICE_PROGRESS and (index + 1) % 100 == 0:
-            print("Curves Processed for object {0} of {1}.".format(index + 1, len(object_list)))
+        if OUTPUT_SLICE_PROGRESS and (index + 1) % OUTPUT_OBJECT_PROGRESS_INTERVAL == 0:
+            print_progress("Curves Processed for object {0} of {1}.".format(index + 1, object_count))
         if object.animation_data is not None:
             for curve in object.animation_data.action.fcurves:
                 curve.keyframe_points.update()
     
-    # Create All Objects
+    # Create All Objects (Hidden Before Linking So They Skip Viewport Evaluation)
     for index, object in enumerate(object_list):
-        if OUTPUT_SLICE_PROGRESS and (index + 1) % 100 == 0:
-            print("Object {0} of {1} added to scene.".format(index + 1, len(object_list)))
-        bpy.context.collection.objects.link(object)
+        if OUTPUT_SLICE_PROGRESS and (index + 1) % OUTPUT_OBJECT_PROGRESS_INTERVAL == 0:
+            print_progress("Object {0} of {1} added to scene.".format(index + 1, object_count))
         hide_object(object)
+        link_object(object)
     
     # Return to Start Frame
-    bpy.context.scene.frame_set(RING_ANIMATION_START)
+    scene.frame_set(RING_ANIMATION_START)
     
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    
+    # Generate Slice Range From Command Line Arguments (See Instructions)
+    arguments = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if len(arguments) == 3:
+        
+        # Generate Into Own Collection So Slices Can Be Appended Into Final Scene
+        collection = bpy.data.collections.new(WORKER_COLLECTION_NAME)
+        bpy.context.scene.collection.children.link(collection)
+        bpy.context.view_layer.active_layer_collection = bpy.context.view_layer.layer_collection.children[collection.name]
+        
+        main(int(arguments[0]), int(arguments[1]))
+        
+        # Write Only the Generated Collection (Its Objects & Their Data Come Along)
+        bpy.data.libraries.write(arguments[2], {collection})
+    elif WORKER_PROCESSES > 1:
+        generate_in_background_processes()
+    else:
+        main()
\ No newline at end of file
@@ -1,5 +1,5 @@
 import bpy
-from random import randrange
+import numpy as np
 
 # File:             GenerateParticleAssembly.py
 # Date:             08.25.2019
@@ -24,6 +24,8 @@ PARTICLE_NAME = "Particle"
 EMITTER_NAME = "Emitter"
 
 MATERIAL_VARIABLE = "visibility"
+MATERIAL_VARIABLE_PATH = "[\"{0}\"]".format(MATERIAL_VARIABLE)
+ANIMATED_DATA_PATHS = frozenset(("location", MATERIAL_VARIABLE_PATH))
 
 START_FRAME = 0
 ASSEMBLY_ANIMATION_LENGTH = 80 # Number of Frames
@@ -31,174 +33,270 @@ ASSEMBLY_RANDOM_VARIATION = 120 # Number of Frames
 ASSEMBLY_TRAVEL_DISTANCE = 25 # Multiple of Initial Distance
 ASSEMBLY_START_VARIATION = 2 # Distance in Blender Units
 ASSEMBLY_FLIGHT_VARIATION = 4 # Must be Even
+ASSEMBLY_FLIGHT_WINDOW = .2 # Fraction of Assembly (Centered) in Which Flight is Varied
+
+FLIGHT_VARIATION_START_FRAME = int(START_FRAME + (((1 - ASSEMBLY_FLIGHT_WINDOW) / 2) * ASSEMBLY_ANIMATION_LENGTH))
+FLIGHT_VARIATION_END_FRAME = int((START_FRAME + ASSEMBLY_ANIMATION_LENGTH) - (((1 - ASSEMBLY_FLIGHT_WINDOW) / 2) * ASSEMBLY_ANIMATION_LENGTH))
+
+ATTRIBUTE_NODE_VERSION = (2, 92, 0) # First Blender Version With Object Attribute Nodes
+
+
+# Insert location keyframes of <locations> at <frames> for given <object>.
+def insert_location_keyframes(object, frames, locations):
+    locations = np.asarray(locations, dtype=np.float32).reshape(-1, 3)
+    co = np.empty(len(frames) * 2, dtype=np.float32)
+    co[0::2] = frames
+    for index in range(3):
+        co[1::2] = locations[:, index]
+        insert_keyframes(object, "location", index, co)
+
+
+# Insert keyframes of flattened (frame, value) pairs <co> on curve of <data_path> and <index>
+# for given <object>. Keyframes are added in bulk and written with a single foreach_set,
+# avoiding the per-call overhead of keyframe_insert().
+def insert_keyframes(object, data_path, index, co):
+    
+    # Ensure Object Has Action
+    if object.animation_data is None:
+        object.animation_data_create()
+    if object.animation_data.action is None:
+        object.animation_data.action = bpy.data.actions.new(name=object.name + "Action")
+    
+    # Get Curve
+    curves = object.animation_data.action.fcurves
+    curve = curves.find(data_path, index=index)
+    if curve is None:
+        curve = curves.new(data_path, index=index)
+    
+    # Preserve Existing Keyframes
+    co = np.asarray(co, dtype=np.float32)
+    existing_count = len(curve.keyframe_points)
+    if existing_count > 0:
+        existing_co = np.empty(existing_count * 2, dtype=np.float32)
+        curve.keyframe_points.foreach_get("co", existing_co)
+        co = np.concatenate((existing_co, co))
+    
+    # Add Keyframes (Bezier Interpolated With Automatic Handles, So Already Eased)
+    curve.keyframe_points.add((len(co) // 2) - existing_count)
+    curve.keyframe_points.foreach_set("co", co)
+    
+    # Sort Keyframes & Calculate Handles
+    curve.update()
+
+
+# Shift all keyframes of <curve> by <offset> frames. Keyframes are read, offset, and written
+# back with a single foreach_get/foreach_set. Handles are left to curve.update(), which
+# recalculates the (still automatic) handles from the shifted keyframes.
+def shift_curve_keyframes(curve, offset):
+    co = np.empty(len(curve.keyframe_points) * 2, dtype=np.float32)
+    curve.keyframe_points.foreach_get("co", co)
+    co[0::2] += offset
+    curve.keyframe_points.foreach_set("co", co)
+    curve.update()
+
+
+# Get the x, y, and z location curves of given <object>.
+def get_location_curves(object):
+    curves = object.animation_data.action.fcurves
+    return [curves.find("location", index=index) for index in range(3)]
 
 
 def create_particle_at_vertex(source_particle, vertex):
     
-    # Create Particle Object
+    # Create Particle Object (Shares Mesh Data With Source Particle)
     new_particle = bpy.data.objects.new(
-        name=(source_particle.name+".{:03d}").format(0),
-        object_data=source_particle.data.copy()
+        name=source_particle.name, # Blender Appends Unique ".###" Suffix
+        object_data=source_particle.data
     )
         
     # Position Object At Vertex
     new_particle.location = vertex.co
     
-    # Add Object to Scene
-    bpy.context.collection.objects.link(new_particle)
-    
     return new_particle
 
 
 def create_basic_motion_keyframes(new_particles, source_particle):
+    start_frame = START_FRAME
+    end_frame = START_FRAME + ASSEMBLY_ANIMATION_LENGTH
     
-    # Set Final Location Keyframe
-    bpy.context.scene.frame_set(START_FRAME + ASSEMBLY_ANIMATION_LENGTH)
-    for particle in new_particles:
-        particle.keyframe_insert("location")
+    # Gather Final Locations
+    end_locations = np.array([particle.location for particle in new_particles], dtype=np.float32).reshape(-1, 3)
+    source_location = np.array(source_particle.location, dtype=np.float32)
     
-    # Set Start Location Keyframe
-    bpy.context.scene.frame_set(START_FRAME)
-    for particle in new_particles:
-        x_variation = randrange(-ASSEMBLY_START_VARIATION, ASSEMBLY_START_VARIATION)
-        y_variation = randrange(-ASSEMBLY_START_VARIATION, ASSEMBLY_START_VARIATION)
-        z_variation = randrange(-ASSEMBLY_START_VARIATION, ASSEMBLY_START_VARIATION)
-        x_pos = (particle.location.x - source_particle.location.x) * ASSEMBLY_TRAVEL_DISTANCE + x_variation
-        y_pos = (particle.location.y - source_particle.location.y) * ASSEMBLY_TRAVEL_DISTANCE + y_variation
-        z_pos = (particle.location.z - source_particle.location.z) * ASSEMBLY_TRAVEL_DISTANCE + z_variation
-        particle.location.x = x_pos
-        particle.location.y = y_pos
-        particle.location.z = z_pos
-        particle.keyframe_insert("location")
+    # Calculate Start Locations
+    variations = np.random.randint(-ASSEMBLY_START_VARIATION, ASSEMBLY_START_VARIATION, end_locations.shape)
+    start_locations = get_start_locations(end_locations, source_location, variations)
+    
+    # Build Location Keyframes (Flattened (frame, value) Pairs Per Particle & Axis)
+    location_co = np.empty((len(new_particles), 3, 4), dtype=np.float32)
+    location_co[:, :, 0] = start_frame
+    location_co[:, :, 1] = start_locations
+    location_co[:, :, 2] = end_frame
+    location_co[:, :, 3] = end_locations
+    
+    # Set Start & Final Location Keyframes
+    for particle, particle_location_co in zip(new_particles, location_co):
+        for index in range(3):
+            insert_keyframes(particle, "location", index, particle_location_co[index])
         
 
+# Project final <end_locations> outward from <source_location> and apply start <variations>.
+# Pure array kernel with no Blender API access; operates in place on a single buffer.
+def get_start_locations(end_locations, source_location, variations):
+    start_locations = end_locations - source_location
+    start_locations *= ASSEMBLY_TRAVEL_DISTANCE
+    start_locations += variations
+    return start_locations
+
+
+# Copy <material> with a driver connecting the value node named <property_name> to the
+# particle property of the same name. The driver target is left empty until the template
+# is copied for a specific particle, sparing a driver_add() per particle.
+def create_driven_material_template(material, property_name):
+    template = material.copy()
+    driver_path = 'nodes["{0}"].outputs[0].default_value'.format(property_name)
+    driver = template.node_tree.driver_add(driver_path)
+    driver.driver.expression = "var"
+    variable = driver.driver.variables.new()
+    variable.type = "SINGLE_PROP"
+    variable.targets[0].data_path = "[\"{0}\"]".format(property_name)
+    return template
+
+
+# Copy <material>, replacing the value node named <property_name> with an attribute node
+# reading the object property of the same name. Unlike a driven material, the copy reads the
+# property of whichever object renders it, so a single copy can be shared by every particle.
+# Source: https://docs.blender.org/manual/en/latest/render/shader_nodes/input/attribute.html
+def create_attribute_material(material, property_name):
+    shared_material = material.copy()
+    nodes = shared_material.node_tree.nodes
+    value_node = nodes[property_name]
+    attribute_node = nodes.new("ShaderNodeAttribute")
+    attribute_node.attribute_type = "OBJECT"
+    attribute_node.attribute_name = property_name
+    attribute_node.location = value_node.location
+    for link in list(value_node.outputs[0].links):
+        shared_material.node_tree.links.new(attribute_node.outputs["Fac"], link.to_socket)
+    nodes.remove(value_node)
+    return shared_material
+
+
 def create_animated_material_input(new_particles):
+    
+    # Nothing to Animate Without Particles
+    if len(new_particles) == 0:
+        return
+    
+    # Create Shared Attribute Material or Driven Material Template
+    # (Attribute Nodes Let Every Particle Share One Copy of the Material. Older Versions
+    #  Fall Back to a Driven Material Template Copied For Each Particle.)
+    share_material = bpy.app.version >= ATTRIBUTE_NODE_VERSION
+    source_material = new_particles[0].material_slots[0].material
+    if share_material:
+        material = create_attribute_material(source_material, MATERIAL_VARIABLE)
+    else:
+        material = create_driven_material_template(source_material, MATERIAL_VARIABLE)
+    
     for particle in new_particles:
         
-        # Set Initial Material Property Keyframe
-        bpy.context.scene.frame_set(START_FRAME)
+        # Set Material Property Keyframes
         particle[MATERIAL_VARIABLE] = 0.0
-        particle.keyframe_insert(data_path="[\"{0}\"]".format(MATERIAL_VARIABLE))
-        
-        # Set Final Material Property Keyframe
-        bpy.context.scene.frame_set(START_FRAME + (ASSEMBLY_ANIMATION_LENGTH / 10))
-        particle[MATERIAL_VARIABLE] = 1.0
-        particle.keyframe_insert(data_path="[\"{0}\"]".format(MATERIAL_VARIABLE))
-        
-        # Duplicate Material For Object (Necessary to Create Material Driver)
-        newMaterial = particle.material_slots[0].material.copy()
-        particle.material_slots[0].material = newMaterial
+        insert_keyframes(particle, MATERIAL_VARIABLE_PATH, 0, (
+            START_FRAME, 0.0,
+            START_FRAME + (ASSEMBLY_ANIMATION_LENGTH / 10), 1.0
+        ))
         
-        # Add Driver For Material & Connect to Property
-        driver_path = 'nodes["{0}"].outputs[0].default_value'.format(MATERIAL_VARIABLE)
-        driver = particle.material_slots[0].material.node_tree.driver_add(driver_path)
-        driver.driver.expression = "var"
-        variable = driver.driver.variables.new()
-        variable.type = "SINGLE_PROP"
-        variable.targets[0].id = particle
-        variable.targets[0].data_path = "[\"{0}\"]".format(MATERIAL_VARIABLE)
+        # Assign Shared Material or Duplicate Driven Material For Object & Connect to Property
+        # (Slot Linked to Object Since Particles Share Mesh Data)
+        particle.material_slots[0].link = "OBJECT"
+        if share_material:
+            particle.material_slots[0].material = material
+        else:
+            newMaterial = material.copy()
+            particle.material_slots[0].material = newMaterial
+            newMaterial.node_tree.animation_data.drivers[0].driver.variables[0].targets[0].id = particle
+    
+    # Remove Material Template
+    if not share_material:
+        bpy.data.materials.remove(material)
         
         
-def get_height_factors(new_particles, source_particle):
-    raw_height_factors = []
-    normalized_height_factors = []
-    max_height_factor = 0
+def get_height_factors(locations, source_location):
+    offsets = np.abs(np.asarray(locations) - np.asarray(source_location))
     
     # Calculate Raw Height Factors
-    for particle in new_particles:
-        x_distance = abs(particle.location.x - source_particle.location.x)
-        y_distance = abs(particle.location.y - source_particle.location.y)
-        if x_distance > y_distance:
-            width = x_distance
-        else:
-            width = y_distance
-        if width == 0:
-            width = .001
-        factor = abs(particle.location.z - source_particle.location.z) / width
-        raw_height_factors.append(factor)
-        if factor > max_height_factor:
-            max_height_factor = factor
-        
-    # Normalize Height Factors
-    for factor in raw_height_factors:
-        if factor > 0:
-            new_factor = factor/max_height_factor
-        else:
-            new_factor = 0
-        normalized_height_factors.append(new_factor)
+    widths = np.maximum(offsets[:, 0], offsets[:, 1])
+    widths[widths == 0] = .001
+    raw_height_factors = offsets[:, 2] / widths
     
-    return normalized_height_factors
+    # Normalize Height Factors
+    max_height_factor = raw_height_factors.max(initial=0)
+    if max_height_factor == 0:
+        return np.zeros(len(raw_height_factors))
+    return raw_height_factors / max_height_factor
 
 
 def give_start_frame_horizontal_bias(new_particles, source_particle):
-    bpy.context.scene.frame_set(START_FRAME)
-    height_factors = get_height_factors(new_particles, source_particle)
     
-    # Update Start Position
-    for index, particle in enumerate(new_particles):
-        factor = height_factors[index]
-        if factor != 0:
-            particle.location.x = particle.location.x * (1 + (5 * factor))
-            particle.location.y = particle.location.y * (1 + (5 * factor))
-            particle.location.z = particle.location.z * .4
-            particle.keyframe_insert("location")
+    # Evaluate Start Locations (Avoids Scene Update From frame_set)
+    location_curves = [get_location_curves(particle) for particle in new_particles]
+    start_locations = np.array([[curve.evaluate(START_FRAME) for curve in curves] for curves in location_curves]).reshape(-1, 3)
+    height_factors = get_height_factors(start_locations, source_particle.location)
+    
+    # Calculate Biased Start Locations
+    scales = np.empty(start_locations.shape)
+    scales[:, 0:2] = (1 + (5 * height_factors))[:, np.newaxis]
+    scales[:, 2] = .4
+    biased_locations = start_locations * scales
+    
+    # Update Start Position (Particles With Nonzero Height Factor)
+    for index in np.flatnonzero(height_factors).tolist():
+        for curve, location in zip(location_curves[index], biased_locations[index].tolist()):
+            curve.keyframe_points[0].co.y = location
+            curve.update()
 
 
 def randomize_flight_pattern(new_particles):
-    for particle in new_particles:
-        
-        # Determine Flight Variation
-        x_variation = randrange(-ASSEMBLY_FLIGHT_VARIATION, ASSEMBLY_FLIGHT_VARIATION)
-        y_variation = randrange(-ASSEMBLY_FLIGHT_VARIATION, ASSEMBLY_FLIGHT_VARIATION)
-        z_variation = randrange(-(ASSEMBLY_FLIGHT_VARIATION/2), (ASSEMBLY_FLIGHT_VARIATION/2))
-        
-        # Determine Variation Frame
-        range = .2
-        range_start = int(START_FRAME + (((1 - range) / 2) * ASSEMBLY_ANIMATION_LENGTH))
-        range_end = int((START_FRAME + ASSEMBLY_ANIMATION_LENGTH) - (((1 - range) / 2) * ASSEMBLY_ANIMATION_LENGTH))
-        frame = randrange(range_start, range_end)
-        
-        # Randomize Flight Path
-        bpy.context.scene.frame_set(frame)
-        particle.location.x = particle.location.x + x_variation
-        particle.location.y = particle.location.y + y_variation
-        particle.location.z = particle.location.z + z_variation
-        
-        # Insert Keyframe
-        particle.keyframe_insert("location")
+    
+    # Determine Flight Variations
+    variations = np.empty((len(new_particles), 3))
+    variations[:, 0:2] = np.random.randint(-ASSEMBLY_FLIGHT_VARIATION, ASSEMBLY_FLIGHT_VARIATION, (len(new_particles), 2))
+    variations[:, 2] = np.random.randint(-int(ASSEMBLY_FLIGHT_VARIATION/2), int(ASSEMBLY_FLIGHT_VARIATION/2), len(new_particles))
+    
+    # Determine Variation Frames
+    frames = np.random.randint(FLIGHT_VARIATION_START_FRAME, FLIGHT_VARIATION_END_FRAME, len(new_particles))
+    
+    # Evaluate Positions at Variation Frames
+    positions = np.array([
+        [curve.evaluate(frame) for curve in get_location_curves(particle)]
+        for particle, frame in zip(new_particles, frames.tolist())
+    ]).reshape(-1, 3)
+    positions += variations
+    
+    # Insert Keyframes
+    for particle, frame, position in zip(new_particles, frames.tolist(), positions):
+        insert_location_keyframes(particle, (frame,), (position,))
         
 
 def randomize_keyframe_delay(new_particles):
-    for particle in new_particles:
+    
+    # Calculate Delays
+    delays = np.random.randint(0, ASSEMBLY_RANDOM_VARIATION, len(new_particles))
+    
+    for particle, delay in zip(new_particles, delays.tolist()):
         curves = particle.animation_data.action.fcurves
         
-        # Calculate Delay
-        delay = randrange(0, ASSEMBLY_RANDOM_VARIATION)
-        
-        # For Each Location Keyframe
+        # For Each Location or Material Keyframe
         for curve in curves:
-            if curve.data_path == "location" or curve.data_path == "[\"{0}\"]".format(MATERIAL_VARIABLE):
-                for keyframe_point in curve.keyframe_points:
+            if curve.data_path in ANIMATED_DATA_PATHS:
+                
+                # Advance By Offset
+                shift_curve_keyframes(curve, delay)
                     
-                    # Advance By Offset
-                    keyframe_point.co.x = keyframe_point.co.x + delay
-                    keyframe_point.handle_left.x = keyframe_point.handle_left.x + delay
-                    keyframe_point.handle_right.x = keyframe_point.handle_right.x + delay
-                    
-def ease_keyframes(new_particles):
-    for particle in new_particles:
-        for curve in particle.animation_data.action.fcurves:
-            if curve.data_path == "location":
-                for keyframe_point in curve.keyframe_points:
-                    keyframe_point.interpolation = "BEZIER"
-    
-
 def remove_easing_on_start_frame(new_particles):
     for particle in new_particles:
-        curves = particle.animation_data.action.fcurves
-        for curve in curves:
-            if curve.data_path == "location":
-                curve.keyframe_points[0].handle_right = curve.keyframe_points[0].co
+        for curve in get_location_curves(particle):
+            curve.keyframe_points[0].handle_right = curve.keyframe_points[0].co
 
 
 # Main Program
@@ -207,6 +305,7 @@ def main():
     # Declare Local Variables
     source_particle = bpy.data.objects[PARTICLE_NAME]
     source_emitter = bpy.data.objects[EMITTER_NAME]
+    link_object = bpy.context.collection.objects.link
     new_particles = []
     
     # Create Particles
@@ -219,9 +318,12 @@ def main():
     give_start_frame_horizontal_bias(new_particles, source_particle)
     randomize_flight_pattern(new_particles)
     randomize_keyframe_delay(new_particles)
-    ease_keyframes(new_particles)
     remove_easing_on_start_frame(new_particles)
     
+    # Add Particles to Scene (Linked Once Fully Animated)
+    for particle in new_particles:
+        link_object(particle)
+    
     # Return to Start Frame
     bpy.context.scene.frame_set(START_FRAME)
     
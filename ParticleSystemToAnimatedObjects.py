@@ -1,4 +1,5 @@
 import bpy
+import numpy as np
 
 # File:             ParticleSystemToAnimatedObjects.py
 # Date:             08.21.2019
@@ -20,47 +21,85 @@ KEYFRAME_ROTATION = True
 KEYFRAME_SCALE = True
 
 
-# Duplicate the given object for every particle and return the duplicates.
+# Duplicate the given object for every particle and return the (unlinked) duplicates.
 def create_objects_for_particles(particle_system, object):
     mesh = object.data
     object_list = []
 
     for index, _ in enumerate(particle_system.particles):
-        mesh_copy = mesh.copy() # Perform deep copy of particle object
-        duplicate = bpy.data.objects.new(name="particle.{:03d}".format(index),object_data=mesh_copy)
-        bpy.context.collection.objects.link(duplicate)
+        # Share mesh data; only object transforms are keyframed, so duplicates needn't own a copy.
+        duplicate = bpy.data.objects.new(name="particle.{:03d}".format(index),object_data=mesh)
         object_list.append(duplicate)
 
     return object_list
 
+# Record the location, rotation, and size of every particle for every frame in the given range.
+# Each frame's particle states are read in bulk with foreach_get, straight into the frame's
+# rows of the state arrays. Arrays are returned indexed by particle, then frame.
+def record_particle_states(ps, start_frame, end_frame):
+    scene = bpy.context.scene
+    particle_count = len(ps.particles)
+    frame_count = end_frame - start_frame + 1
+    locations = np.empty((frame_count, particle_count * 3), dtype=np.float32)
+    rotations = np.empty((frame_count, particle_count * 4), dtype=np.float32)
+    sizes = np.empty((frame_count, particle_count), dtype=np.float32)
+
+    for frame_index, frame in enumerate(range(start_frame, end_frame + 1)):
+        scene.frame_set(frame)
+        ps.particles.foreach_get("location", locations[frame_index])
+        ps.particles.foreach_get("rotation", rotations[frame_index])
+        ps.particles.foreach_get("size", sizes[frame_index])
+
+    return (
+        locations.reshape(frame_count, particle_count, 3).swapaxes(0, 1),
+        rotations.reshape(frame_count, particle_count, 4).swapaxes(0, 1),
+        sizes.swapaxes(0, 1)
+    )
+
 # Match and keyframe the objects to the particles for every frame in the  given range.
 def match_and_keyframe_objects(ps, object_list, start_frame, end_frame):
-    for frame in range(start_frame, end_frame + 1):
-        bpy.context.scene.frame_set(frame)
-        for particle, object in zip(ps.particles, object_list):
-            match_object_to_particle(particle, object)
-            add_keyframes_to_object(object)
-
-# Match the location, rotation, scale and visibility of the object to the particle.
-def match_object_to_particle(particle, object):
-    location = particle.location
-    rotation = particle.rotation
-    size = particle.size
-    visibility = True
+    frames = np.arange(start_frame, end_frame + 1, dtype=np.float32)
+    locations, rotations, sizes = record_particle_states(ps, start_frame, end_frame)
+    scales = np.repeat(sizes[:, :, np.newaxis], 3, axis=2)
+    for object, object_locations, object_rotations, object_scales in zip(object_list, locations, rotations, scales):
+        match_object_to_particle(object, object_locations[-1], object_rotations[-1], object_scales[-1])
+        add_keyframes_to_object(object, frames, object_locations, object_rotations, object_scales)
+
+# Match the location, rotation, and scale of the object to a recorded particle state.
+def match_object_to_particle(object, location, rotation, scale):
     object.location = location
     # Set rotation mode to quaternion to match particle rotation.
     object.rotation_mode = 'QUATERNION'
     object.rotation_quaternion = rotation
-    object.scale = (size, size, size)
+    object.scale = scale
 
-# Keyframe location, rotation, and scale
-def add_keyframes_to_object(object):
+# Keyframe location, rotation, and scale for every frame at once.
+def add_keyframes_to_object(object, frames, locations, rotations, scales):
     if KEYFRAME_LOCATION:
-        object.keyframe_insert("location")
+        insert_keyframes(object, "location", frames, locations)
     if KEYFRAME_ROTATION:
-        object.keyframe_insert("rotation_quaternion")
+        insert_keyframes(object, "rotation_quaternion", frames, rotations)
     if KEYFRAME_SCALE:
-        object.keyframe_insert("scale")
+        insert_keyframes(object, "scale", frames, scales)
+
+# Create a curve of <data_path> for each column of <values> and fill it with one keyframe per
+# frame of <frames>. Keyframes are added in bulk and written with a single foreach_set,
+# avoiding a keyframe_insert() call per object per frame.
+def insert_keyframes(object, data_path, frames, values):
+    if object.animation_data is None:
+        object.animation_data_create()
+    if object.animation_data.action is None:
+        object.animation_data.action = bpy.data.actions.new(name=object.name + "Action")
+    curves = object.animation_data.action.fcurves
+
+    co = np.empty(len(frames) * 2, dtype=np.float32)
+    co[0::2] = frames
+    for index in range(values.shape[1]):
+        co[1::2] = values[:, index]
+        curve = curves.new(data_path, index=index, action_group="Object Transforms")
+        curve.keyframe_points.add(len(frames))
+        curve.keyframe_points.foreach_set("co", co)
+        curve.update()
 
 # Main program
 def main():
@@ -84,5 +123,10 @@ def main():
     object_list = create_objects_for_particles(particle_system, object)
     match_and_keyframe_objects(particle_system, object_list, start_frame, end_frame)
 
+    # Link objects once keyframed, so they aren't evaluated on every recorded frame
+    link_object = bpy.context.collection.objects.link
+    for duplicate in object_list:
+        link_object(duplicate)
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
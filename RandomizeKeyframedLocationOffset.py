@@ -1,5 +1,5 @@
 import bpy
-from random import randrange
+import numpy as np
 
 # File:             RandomizeKeyframedLocationOffset.py
 # Date:             08.21.2019
@@ -16,27 +16,37 @@ MIN_OFFSET = 0
 MAX_OFFSET = 40
 
 
+# Shift all keyframes of <curve> by <offset> frames. Keyframes and both of their handles are
+# read, offset, and written back with one foreach_get/foreach_set each, so curves keep their
+# shape whatever their handle types.
+def shift_curve_keyframes(curve, offset):
+    buffer = np.empty(len(curve.keyframe_points) * 2, dtype=np.float32)
+    for attribute in ("co", "handle_left", "handle_right"):
+        curve.keyframe_points.foreach_get(attribute, buffer)
+        buffer[0::2] += offset
+        curve.keyframe_points.foreach_set(attribute, buffer)
+    curve.update()
+
+
 # Main Program
 def main():
    
     # Get Object List
     object_list = bpy.context.selected_objects
+    
+    # Determine Offsets
+    offsets = np.random.randint(MIN_OFFSET, MAX_OFFSET, len(object_list))
    
     # For Each Object
-    for object in object_list:
+    for object, offset in zip(object_list, offsets.tolist()):
         object_curves = object.animation_data.action.fcurves
         
-        # Determine Offset
-        offset = randrange(MIN_OFFSET, MAX_OFFSET)
-        print(offset)
-        
-        # For Each Location Keyframe
+        # For Each Location Curve
         for curve in object_curves:
             if curve.data_path == "location": # or curve.data_path == "box":
-                for keyframe_point in curve.keyframe_points:
-                    
-                    # Advance By Offset
-                    keyframe_point.co.x = keyframe_point.co.x + offset
+                
+                # Advance By Offset
+                shift_curve_keyframes(curve, offset)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file